@@ -1,8 +1,10 @@
 from airflow import DAG
 from airflow.operators.python import PythonOperator
 from airflow.operators.bash import BashOperator
+from airflow.exceptions import AirflowSkipException
 from airflow.utils.dates import days_ago
 from datetime import datetime, timedelta
+import logging
 import sys
 import os
 import pandas as pd
@@ -16,12 +18,14 @@ from extract.news_scraper import NewsScraper
 from extract.portfolio_db import PortfolioDatabase
 from transform.data_transformer import DataTransformer
 from load.bigquery_loader import BigQueryLoader
+from common.config import get_config
 
-import yaml
 from dotenv import load_dotenv
 
 load_dotenv('/opt/airflow/.env')
 
+log = logging.getLogger(__name__)
+
 
 # Default arguments
 default_args = {
@@ -55,17 +59,44 @@ dag = DAG(
 #     python_callable=test_email_task,
 #     dag=dag,
 # )
-# Load config
-with open('/opt/airflow/config/config.yaml', 'r') as f:
-    config = yaml.safe_load(f)
+# Load config lazily inside tasks, so scheduler DAG parses never touch the YAML
+CONFIG_PATH = '/opt/airflow/config/config.yaml'
 
 # Temp directory
 TEMP_DIR = '/tmp/financial_etl'
 
+def _write_temp(df, name):
+    """Write a DataFrame to the temp directory as Parquet"""
+    filepath = f"{TEMP_DIR}/{name}.parquet"
+    df.to_parquet(filepath, engine="pyarrow", compression="snappy", index=False)
+    return filepath
+
+def _downcast_integers(df, columns):
+    """Shrink integer columns to the smallest dtype that holds them (lossless)"""
+    for col in columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def _read_temp(filepath):
+    """Read a DataFrame written by _write_temp"""
+    return pd.read_parquet(filepath, engine="pyarrow")
+
+def _new_loader():
+    """Build a BigQueryLoader for the pipeline dataset (one per task run)"""
+    return BigQueryLoader(os.getenv('BIGQUERY_PROJECT_ID'), 'financial_data')
+
 def setup_temp_dir():
-    """Create temporary directory"""
+    """Create temporary directory and any missing dashboard views"""
     os.makedirs(TEMP_DIR, exist_ok=True)
-    print(f"✅ Created temp directory: {TEMP_DIR}")
+    log.info("Created temp directory: %s", TEMP_DIR)
+    
+    # Existing datasets predate stock_prices_daily; creating it is a no-op once it exists,
+    # and it is skipped until the first load has created stock_prices. The dashboard
+    # falls back to stock_prices, so a failure here must not fail the run.
+    try:
+        _new_loader().create_views()
+    except Exception as e:
+        log.warning("Could not create dashboard views: %s", e)
 
 # Task 0: Setup
 setup_task = PythonOperator(
@@ -77,29 +108,31 @@ setup_task = PythonOperator(
 # Task 1: Extract Stock Data
 def extract_stock_data(**context):
     """Extract stock data from Alpha Vantage API"""
-    print("=" * 70)
-    print("📊 EXTRACTING STOCK DATA")
-    print("=" * 70)
+    log.info("Extracting stock data")
     
-    extractor = StockDataExtractor()
-    symbols = config['stocks']['symbols']
+    symbols = get_config(CONFIG_PATH)['stocks']['symbols']
     
-    print(f"\nTarget symbols: {', '.join(symbols)}")
+    log.info("Target symbols: %s", ', '.join(symbols))
     
-    stock_df = extractor.get_multiple_stocks(symbols)
+    with StockDataExtractor() as extractor:
+        stock_df = extractor.get_multiple_stocks(symbols)
     
     if stock_df.empty:
         raise ValueError("❌ No stock data extracted!")
     
-    filepath = f"{TEMP_DIR}/stock_data.csv"
-    stock_df.to_csv(filepath, index=False)
+    # Symbols that actually returned data; failed or empty fetches are dropped upstream
+    fetched_symbols = stock_df['symbol'].unique().tolist()
+    
+    stock_df = _downcast_integers(stock_df, ['volume'])
+    filepath = _write_temp(stock_df, 'stock_data')
     
-    print(f"\n✅ SUCCESS: Extracted {len(stock_df)} records for {len(stock_df['symbol'].unique())} symbols")
-    print(f"📁 Saved to: {filepath}")
+    log.info("Extracted %d records for %d of %d symbols to %s",
+             len(stock_df), len(fetched_symbols), len(symbols), filepath)
     
     # Push to XCom
     context['task_instance'].xcom_push(key='stock_count', value=len(stock_df))
-    context['task_instance'].xcom_push(key='stock_symbols', value=stock_df['symbol'].unique().tolist())
+    context['task_instance'].xcom_push(key='stock_symbols', value=fetched_symbols)
+    return filepath
 
 extract_stocks_task = PythonOperator(
     task_id='extract_stock_data',
@@ -110,27 +143,24 @@ extract_stocks_task = PythonOperator(
 # Task 2: Extract Crypto Data
 def extract_crypto_data(**context):
     """Extract crypto data from CoinGecko API"""
-    print("=" * 70)
-    print("💰 EXTRACTING CRYPTO DATA")
-    print("=" * 70)
+    log.info("Extracting crypto data")
     
-    extractor = CryptoDataExtractor()
-    crypto_ids = config['crypto']['symbols']
+    crypto_ids = get_config(CONFIG_PATH)['crypto']['symbols']
     
-    print(f"\nTarget cryptocurrencies: {', '.join(crypto_ids)}")
+    log.info("Target cryptocurrencies: %s", ', '.join(crypto_ids))
     
-    crypto_df = extractor.get_current_prices(crypto_ids)
+    with CryptoDataExtractor() as extractor:
+        crypto_df = extractor.get_current_prices(crypto_ids)
     
     if crypto_df.empty:
         raise ValueError("❌ No crypto data extracted!")
     
-    filepath = f"{TEMP_DIR}/crypto_data.csv"
-    crypto_df.to_csv(filepath, index=False)
+    filepath = _write_temp(crypto_df, 'crypto_data')
     
-    print(f"\n✅ SUCCESS: Extracted {len(crypto_df)} crypto records")
-    print(f"📁 Saved to: {filepath}")
+    log.info("Extracted %d crypto records to %s", len(crypto_df), filepath)
     
     context['task_instance'].xcom_push(key='crypto_count', value=len(crypto_df))
+    return filepath
 
 extract_crypto_task = PythonOperator(
     task_id='extract_crypto_data',
@@ -141,37 +171,28 @@ extract_crypto_task = PythonOperator(
 # Task 3: Extract News
 def extract_news_data(**context):
     """Scrape news from financial websites"""
-    print("=" * 70)
-    print("📰 EXTRACTING NEWS DATA")
-    print("=" * 70)
+    log.info("Extracting news data")
     
-    scraper = NewsScraper()
-    symbols = config['stocks']['symbols'][:3]  # Top 3 stocks for news
+    symbols = get_config(CONFIG_PATH)['stocks']['symbols'][:3]  # Top 3 stocks for news
     
-    print(f"\nScraping news for: {', '.join(symbols)}")
+    log.info("Scraping news for: %s", ', '.join(symbols))
     
-    all_news = []
-    for symbol in symbols:
-        print(f"\n  Scraping {symbol}...")
-        news_df = scraper.scrape_yahoo_finance(symbol)
-        if news_df.empty:
-            news_df = scraper.scrape_finviz_news(symbol)
-        if not news_df.empty:
-            all_news.append(news_df)
-            print(f"  ✅ Found {len(news_df)} articles for {symbol}")
+    # Yahoo Finance first, Finviz as fallback; symbols scraped concurrently (bounded)
+    with NewsScraper() as scraper:
+        news_df = scraper.scrape_multiple_symbols(symbols)
     
-    if all_news:
-        news_df = pd.concat(all_news, ignore_index=True)
-    else:
-        news_df = pd.DataFrame()
+    if news_df.empty:
+        # No file and no path: transform_load_news skips itself
+        log.warning("No news articles extracted")
+        context['task_instance'].xcom_push(key='news_count', value=0)
+        return None
     
-    filepath = f"{TEMP_DIR}/news_data.csv"
-    news_df.to_csv(filepath, index=False)
+    filepath = _write_temp(news_df, 'news_data')
     
-    print(f"\n✅ SUCCESS: Extracted {len(news_df)} news articles")
-    print(f"📁 Saved to: {filepath}")
+    log.info("Extracted %d news articles to %s", len(news_df), filepath)
     
     context['task_instance'].xcom_push(key='news_count', value=len(news_df))
+    return filepath
 
 extract_news_task = PythonOperator(
     task_id='extract_news_data',
@@ -182,28 +203,29 @@ extract_news_task = PythonOperator(
 # Task 4: Extract Portfolio
 def extract_portfolio_data(**context):
     """Extract portfolio data from PostgreSQL"""
-    print("=" * 70)
-    print("💼 EXTRACTING PORTFOLIO DATA")
-    print("=" * 70)
+    log.info("Extracting portfolio data")
     
     try:
-        db = PortfolioDatabase(config['database'])
+        db = PortfolioDatabase(get_config(CONFIG_PATH)['database'])
         db.connect()
         portfolio_df = db.extract_portfolio_data()
         db.close()
-        
-        filepath = f"{TEMP_DIR}/portfolio_data.csv"
-        portfolio_df.to_csv(filepath, index=False)
-        
-        print(f"\n✅ SUCCESS: Extracted {len(portfolio_df)} portfolio records")
-        print(f"📁 Saved to: {filepath}")
-        
-        context['task_instance'].xcom_push(key='portfolio_count', value=len(portfolio_df))
     except Exception as e:
-        print(f"\n⚠️  WARNING: Portfolio extraction failed: {str(e)}")
-        # Create empty file
-        pd.DataFrame().to_csv(f"{TEMP_DIR}/portfolio_data.csv", index=False)
+        log.warning("Portfolio extraction failed: %s", e)
+        portfolio_df = pd.DataFrame()
+    
+    if portfolio_df.empty:
+        # No file and no path: transform_load_portfolio skips itself
         context['task_instance'].xcom_push(key='portfolio_count', value=0)
+        return None
+    
+    portfolio_df = _downcast_integers(portfolio_df, ['user_id'])
+    filepath = _write_temp(portfolio_df, 'portfolio_data')
+    
+    log.info("Extracted %d portfolio records to %s", len(portfolio_df), filepath)
+    
+    context['task_instance'].xcom_push(key='portfolio_count', value=len(portfolio_df))
+    return filepath
 
 extract_portfolio_task = PythonOperator(
     task_id='extract_portfolio_data',
@@ -211,161 +233,127 @@ extract_portfolio_task = PythonOperator(
     dag=dag,
 )
 
-# Task 5: Transform All Data
-def transform_all_data(**context):
-    """Transform all extracted data"""
-    print("=" * 70)
-    print("🔄 TRANSFORMING DATA")
-    print("=" * 70)
-    
-    transformer = DataTransformer()
-    
-    # Transform stock data
-    print("\n  Transforming stock data...")
-    stock_df = pd.read_csv(f"{TEMP_DIR}/stock_data.csv")
-    stock_df['date'] = pd.to_datetime(stock_df['date'])
-    stock_df['extraction_timestamp'] = pd.to_datetime(stock_df['extraction_timestamp'])
-    stock_transformed = transformer.transform_stock_data(stock_df)
-    stock_transformed.to_csv(f"{TEMP_DIR}/stock_transformed.csv", index=False)
-    
-    # Transform crypto data
-    print("  Transforming crypto data...")
-    crypto_df = pd.read_csv(f"{TEMP_DIR}/crypto_data.csv")
-    crypto_df['timestamp'] = pd.to_datetime(crypto_df['timestamp'])
-    crypto_transformed = transformer.transform_crypto_data(crypto_df)
-    crypto_transformed.to_csv(f"{TEMP_DIR}/crypto_transformed.csv", index=False)
-    
-    # Transform news data
-    print("  Transforming news data...")
-    news_df = pd.read_csv(f"{TEMP_DIR}/news_data.csv")
-    if not news_df.empty:
-        news_df['scraped_at'] = pd.to_datetime(news_df['scraped_at'])
-        news_transformed = transformer.transform_news_data(news_df)
-        news_transformed.to_csv(f"{TEMP_DIR}/news_transformed.csv", index=False)
-    
-    # Transform portfolio data
-    print("  Transforming portfolio data...")
-    try:
-        portfolio_df = pd.read_csv(f"{TEMP_DIR}/portfolio_data.csv")
-        if not portfolio_df.empty:
-            portfolio_df['purchase_date'] = pd.to_datetime(portfolio_df['purchase_date'])
-            portfolio_df['created_at'] = pd.to_datetime(portfolio_df['created_at'])
-            portfolio_df['extraction_timestamp'] = pd.to_datetime(portfolio_df['extraction_timestamp'])
-            portfolio_transformed = transformer.transform_portfolio_data(portfolio_df)
-            portfolio_transformed.to_csv(f"{TEMP_DIR}/portfolio_transformed.csv", index=False)
-    except Exception as e:
-        print(f"  ⚠️  No portfolio data to transform: {str(e)}")
-    
-    print("\n✅ SUCCESS: All data transformed")
-
-transform_task = PythonOperator(
-    task_id='transform_all_data',
-    python_callable=transform_all_data,
-    dag=dag,
-)
+# Tasks 5-8: Transform + Load, fused per asset class
+# Each asset is transformed and loaded in the same process, so the
+# transformed DataFrame never goes back to disk. Extraction stays a separate
+# task so a failed load retries without re-hitting the rate-limited APIs.
+ASSET_PIPELINES = {
+    'stock': {
+        'extract_task_id': 'extract_stock_data',
+        'table_name': 'stock_prices',
+        'transform': DataTransformer.transform_stock_data,
+        'load': BigQueryLoader.load_stock_prices,
+    },
+    'crypto': {
+        'extract_task_id': 'extract_crypto_data',
+        'table_name': 'crypto_prices',
+        'transform': DataTransformer.transform_crypto_data,
+        'load': BigQueryLoader.load_crypto_prices,
+    },
+    'news': {
+        'extract_task_id': 'extract_news_data',
+        'table_name': 'market_news',
+        'transform': DataTransformer.transform_news_data,
+        'load': BigQueryLoader.load_news,
+    },
+    'portfolio': {
+        'extract_task_id': 'extract_portfolio_data',
+        'table_name': 'user_portfolio',
+        'transform': DataTransformer.transform_portfolio_data,
+        'load': BigQueryLoader.load_portfolio,
+    },
+}
 
-# Task 6: Load to BigQuery
-def load_to_bigquery(**context):
-    """Load all transformed data to BigQuery"""
-    print("=" * 70)
-    print("📤 LOADING TO BIGQUERY")
-    print("=" * 70)
-    
-    project_id = os.getenv('BIGQUERY_PROJECT_ID')
-    loader = BigQueryLoader(project_id, 'financial_data')
-    
-    total_loaded = 0
-    
-    # Load stock data
-    print("\n  Loading stock data...")
-    stock_df = pd.read_csv(f"{TEMP_DIR}/stock_transformed.csv")
-    stock_df['date'] = pd.to_datetime(stock_df['date'])
-    stock_df['extraction_timestamp'] = pd.to_datetime(stock_df['extraction_timestamp'])
-    stock_df['transformed_at'] = pd.to_datetime(stock_df['transformed_at'])
-    stock_loaded = loader.load_stock_prices(stock_df)
-    total_loaded += stock_loaded
-    
-    # Load crypto data
-    print("  Loading crypto data...")
-    crypto_df = pd.read_csv(f"{TEMP_DIR}/crypto_transformed.csv")
-    crypto_df['timestamp'] = pd.to_datetime(crypto_df['timestamp'])
-    crypto_df['transformed_at'] = pd.to_datetime(crypto_df['transformed_at'])
-    crypto_loaded = loader.load_crypto_prices(crypto_df)
-    total_loaded += crypto_loaded
-    
-    # Load news data
-    print("  Loading news data...")
-    try:
-        news_df = pd.read_csv(f"{TEMP_DIR}/news_transformed.csv")
-        if not news_df.empty:
-            news_df['scraped_at'] = pd.to_datetime(news_df['scraped_at'])
-            news_df['transformed_at'] = pd.to_datetime(news_df['transformed_at'])
-            news_loaded = loader.load_news(news_df)
-            total_loaded += news_loaded
-        else:
-            news_loaded = 0
-    except Exception as e:
-        print(f"  ⚠️  No news to load: {str(e)}")
-        news_loaded = 0
-    
-    # Load portfolio data
-    print("  Loading portfolio data...")
-    try:
-        portfolio_df = pd.read_csv(f"{TEMP_DIR}/portfolio_transformed.csv")
-        if not portfolio_df.empty:
-            portfolio_df['purchase_date'] = pd.to_datetime(portfolio_df['purchase_date'])
-            portfolio_df['created_at'] = pd.to_datetime(portfolio_df['created_at'])
-            portfolio_df['extraction_timestamp'] = pd.to_datetime(portfolio_df['extraction_timestamp'])
-            portfolio_df['transformed_at'] = pd.to_datetime(portfolio_df['transformed_at'])
-            portfolio_loaded = loader.load_portfolio(portfolio_df)
-            total_loaded += portfolio_loaded
-        else:
-            portfolio_loaded = 0
-    except Exception as e:
-        print(f"  ⚠️  No portfolio to load: {str(e)}")
-        portfolio_loaded = 0
-    
-    # Log pipeline metrics
-    metrics = {
-        'pipeline_run_id': context['dag_run'].run_id,
-        'table_name': 'all_tables',
-        'records_extracted': total_loaded,
-        'records_transformed': total_loaded,
-        'records_loaded': total_loaded,
-        'errors': 0,
-        'execution_time_seconds': 0,
-        'status': 'SUCCESS',
-        'error_message': None,
-        'run_timestamp': datetime.now()
-    }
-    
-    loader.log_pipeline_metrics(metrics)
+def transform_and_load(asset, **context):
+    """Transform one asset's extracted data and load it to BigQuery"""
+    log.info("Transforming + loading %s data", asset)
     
-    print(f"\n✅ SUCCESS: Loaded total of {total_loaded} records")
-    print(f"  - Stocks: {stock_loaded}")
-    print(f"  - Crypto: {crypto_loaded}")
-    print(f"  - News: {news_loaded}")
-    print(f"  - Portfolio: {portfolio_loaded}")
+    pipeline = ASSET_PIPELINES[asset]
+    ti = context['task_instance']
     
-    context['task_instance'].xcom_push(key='total_loaded', value=total_loaded)
-    context['task_instance'].xcom_push(key='stock_loaded', value=stock_loaded)
-    context['task_instance'].xcom_push(key='crypto_loaded', value=crypto_loaded)
-    context['task_instance'].xcom_push(key='news_loaded', value=news_loaded)
+    filepath = ti.xcom_pull(task_ids=pipeline['extract_task_id'])
+    if filepath is None:
+        raise AirflowSkipException(f"No {asset} data extracted")
+    
+    df = _read_temp(filepath)
+    transformed = pipeline['transform'](DataTransformer(), df)
+    loaded = pipeline['load'](_new_loader(), transformed)
+    
+    log.info("Loaded %d %s records", loaded, asset)
+    ti.xcom_push(key='records_loaded', value=loaded)
+
+transform_load_tasks = {
+    asset: PythonOperator(
+        task_id=f'transform_load_{asset}',
+        python_callable=transform_and_load,
+        op_kwargs={'asset': asset},
+        dag=dag,
+    )
+    for asset in ASSET_PIPELINES
+}
 
-load_task = PythonOperator(
-    task_id='load_to_bigquery',
-    python_callable=load_to_bigquery,
+# Task 9: Log Pipeline Metrics
+def log_metrics(**context):
+    """Log pipeline metrics for all loaded data to BigQuery"""
+    log.info("Logging pipeline metrics")
+    
+    ti = context['task_instance']
+    loaded = {
+        asset: ti.xcom_pull(task_ids=f'transform_load_{asset}', key='records_loaded') or 0
+        for asset in ASSET_PIPELINES
+    }
+    total_loaded = sum(loaded.values())
+    
+    run_id = context['dag_run'].run_id
+    run_timestamp = datetime.now()
+    
+    def metrics_row(table_name, records):
+        return {
+            'pipeline_run_id': run_id,
+            'table_name': table_name,
+            'records_extracted': records,
+            'records_transformed': records,
+            'records_loaded': records,
+            'errors': 0,
+            'execution_time_seconds': 0,
+            'status': 'SUCCESS',
+            'error_message': None,
+            'run_timestamp': run_timestamp
+        }
+    
+    # One row per table plus the run total, written in a single load job
+    loader = _new_loader()
+    for asset, pipeline in ASSET_PIPELINES.items():
+        loader.log_pipeline_metrics(metrics_row(pipeline['table_name'], loaded[asset]), buffer=True)
+    loader.log_pipeline_metrics(metrics_row('all_tables', total_loaded), buffer=True)
+    loader.flush_metrics()
+    
+    log.info(
+        "Loaded total of %d records (stocks=%d, crypto=%d, news=%d, portfolio=%d)",
+        total_loaded, loaded['stock'], loaded['crypto'], loaded['news'], loaded['portfolio'],
+    )
+    
+    ti.xcom_push(key='total_loaded', value=total_loaded)
+    ti.xcom_push(key='stock_loaded', value=loaded['stock'])
+    ti.xcom_push(key='crypto_loaded', value=loaded['crypto'])
+    ti.xcom_push(key='news_loaded', value=loaded['news'])
+
+metrics_task = PythonOperator(
+    task_id='log_pipeline_metrics',
+    python_callable=log_metrics,
+    trigger_rule='none_failed',  # Still runs when news/portfolio were skipped
     dag=dag,
 )
 
-# Task 7: Cleanup
+# Task 10: Cleanup
 def cleanup_temp_files():
     """Clean up temporary files"""
-    import shutil
-    if os.path.exists(TEMP_DIR):
-        shutil.rmtree(TEMP_DIR)
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    print("✅ Cleaned up temporary files")
+    # Only the extract outputs are written; unlink them and keep the directory
+    for asset in ASSET_PIPELINES:
+        filepath = f"{TEMP_DIR}/{asset}_data.parquet"
+        if os.path.exists(filepath):
+            os.unlink(filepath)
+    log.info("Cleaned up temporary files")
 
 cleanup_task = PythonOperator(
     task_id='cleanup_temp_files',
@@ -373,7 +361,7 @@ cleanup_task = PythonOperator(
     dag=dag,
 )
 
-# Task 8: Generate Summary Report
+# Task 11: Generate Summary Report
 def generate_summary(**context):
     """Generate pipeline execution summary"""
     ti = context['task_instance']
@@ -382,7 +370,7 @@ def generate_summary(**context):
     crypto_count = ti.xcom_pull(task_ids='extract_crypto_data', key='crypto_count')
     news_count = ti.xcom_pull(task_ids='extract_news_data', key='news_count')
     portfolio_count = ti.xcom_pull(task_ids='extract_portfolio_data', key='portfolio_count')
-    total_loaded = ti.xcom_pull(task_ids='load_to_bigquery', key='total_loaded')
+    total_loaded = ti.xcom_pull(task_ids='log_pipeline_metrics', key='total_loaded')
     stock_symbols = ti.xcom_pull(task_ids='extract_stock_data', key='stock_symbols')
     
     # Use logical_date instead of execution_date (deprecated)
@@ -418,7 +406,7 @@ def generate_summary(**context):
 Next run scheduled: Tomorrow at 6:00 AM
     """
     
-    print(summary)
+    log.info(summary)
     
     # Save summary to file
     with open('/opt/airflow/logs/pipeline_summary.txt', 'w') as f:
@@ -434,5 +422,8 @@ summary_task = PythonOperator(
 
 # Define task dependencies
 setup_task  >> [extract_stocks_task, extract_crypto_task, extract_news_task, extract_portfolio_task]
-[extract_stocks_task, extract_crypto_task, extract_news_task, extract_portfolio_task] >> transform_task
-transform_task >> load_task >> cleanup_task >> summary_task
\ No newline at end of file
+extract_stocks_task >> transform_load_tasks['stock']
+extract_crypto_task >> transform_load_tasks['crypto']
+extract_news_task >> transform_load_tasks['news']
+extract_portfolio_task >> transform_load_tasks['portfolio']
+list(transform_load_tasks.values()) >> metrics_task >> cleanup_task >> summary_task
\ No newline at end of file
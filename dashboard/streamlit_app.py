@@ -1,11 +1,17 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
+from google.cloud.exceptions import NotFound
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor
 import os
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
 # Page config
@@ -16,17 +22,30 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load environment
-load_dotenv()
+# Load environment once per process, not on every rerun
+@st.cache_resource
+def get_settings():
+    load_dotenv()
+    return SimpleNamespace(
+        project_id=os.getenv('BIGQUERY_PROJECT_ID'),
+        dataset='financial_data'
+    )
 
 # Initialize BigQuery client
 @st.cache_resource
 def get_bigquery_client():
     return bigquery.Client()
 
+# Read query results over the Storage Read API (parallel Arrow streams)
+@st.cache_resource
+def get_bqstorage_client():
+    return bigquery_storage.BigQueryReadClient()
+
 client = get_bigquery_client()
-project_id = os.getenv('BIGQUERY_PROJECT_ID')
-dataset = 'financial_data'
+bqstorage_client = get_bqstorage_client()
+settings = get_settings()
+project_id = settings.project_id
+dataset = settings.dataset
 
 # Custom CSS
 st.markdown("""
@@ -99,12 +118,86 @@ def get_date_filter(range_str):
     else:
         return datetime(2020, 1, 1)
 
+# Max points sent to the browser per line trace
+MAX_TRACE_POINTS = 2000
+
+# Shared Plotly config: no mode bar or logo to serialize on every rerun
+CHART_CONFIG = {'displaylogo': False, 'displayModeBar': False, 'responsive': True}
+
+def downsample(df, y_col, max_points=MAX_TRACE_POINTS):
+    """Downsample a date-sorted frame with Largest-Triangle-Three-Buckets (LTTB)
+    
+    Row position stands in for x, which matches the evenly spaced daily rows,
+    so the visual shape (peaks, troughs) of y_col is kept with far fewer points.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+    
+    y = df[y_col].to_numpy(dtype=float)
+    bucket = (n - 2) / (max_points - 2)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        # Average of the next bucket is the third vertex of the triangle
+        avg_x = (end + next_end - 1) / 2
+        avg_y = y[end:next_end].mean()
+        xs = np.arange(start, end)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    
+    return df.iloc[keep]
+
+# Rows sent to the browser per "Show more" page of a raw-data table
+RAW_PAGE_ROWS = 500
+
+def _show_more_rows(rows_key):
+    st.session_state[rows_key] = st.session_state.get(rows_key, 0) + RAW_PAGE_ROWS
+
+def show_raw_data(df, sort_col, key, **kwargs):
+    """Render the newest rows of df only once requested, one page at a time
+    
+    Expander bodies always run, so without this the full frame is serialized
+    on every rerun even while the expander is collapsed.
+    """
+    rows_key = f"{key}_rows"
+    rows = st.session_state.get(rows_key, 0)
+    if rows == 0:
+        st.button("Load data", key=f"{key}_load", on_click=_show_more_rows, args=(rows_key,))
+        return
+    
+    st.dataframe(df.nlargest(rows, sort_col), use_container_width=True, **kwargs)
+    if rows < len(df):
+        st.caption(f"Showing {rows:,} of {len(df):,} rows")
+        st.button("Show more", key=f"{key}_more", on_click=_show_more_rows, args=(rows_key,))
+
 # Load data functions
+@st.cache_data(ttl=3600)
+def get_stock_table():
+    """Stock table to query: the stock_prices_daily view, or stock_prices until the view exists"""
+    try:
+        client.get_table(f"{project_id}.{dataset}.stock_prices_daily")
+        return 'stock_prices_daily'
+    except NotFound:
+        return 'stock_prices'
+
+def _run_query(query, params=()):
+    """Run a parameterized query; identical SQL text lets BigQuery reuse its result cache"""
+    job_config = bigquery.QueryJobConfig(query_parameters=list(params), use_query_cache=True)
+    table = client.query(query, job_config=job_config, job_id_prefix='dash-').to_arrow(bqstorage_client=bqstorage_client)
+    # Single Arrow -> pandas conversion that frees each Arrow column as it is copied
+    return table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+
 @st.cache_data(ttl=300)
 def load_stock_data(symbols, date_filter):
     if not symbols:
         return pd.DataFrame()
-    symbols_str = "', '".join(symbols)
     query = f"""
     SELECT 
         date,
@@ -115,18 +208,62 @@ def load_stock_data(symbols, date_filter):
         ma_7,
         ma_30,
         price_change_pct
-    FROM `{project_id}.{dataset}.stock_prices`
-    WHERE symbol IN ('{symbols_str}')
-    AND date >= '{date_filter.date()}'
+    FROM `{project_id}.{dataset}.{get_stock_table()}`
+    WHERE symbol IN UNNEST(@symbols)
+    AND date >= @since
     ORDER BY date DESC, symbol
     """
-    return client.query(query).to_dataframe()
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+        bigquery.ScalarQueryParameter("since", "DATE", date_filter),
+    ])
+
+@st.cache_data(ttl=300)
+def load_stock_summary(symbols, date_filter):
+    """Per-symbol aggregates for the key metric tiles, computed in BigQuery"""
+    if not symbols:
+        return pd.DataFrame()
+    query = f"""
+    SELECT 
+        symbol,
+        AVG(price_change_pct) AS avg_change,
+        SUM(volume) AS total_volume,
+        COUNT(*) AS data_points
+    FROM `{project_id}.{dataset}.{get_stock_table()}`
+    WHERE symbol IN UNNEST(@symbols)
+    AND date >= @since
+    GROUP BY symbol
+    """
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+        bigquery.ScalarQueryParameter("since", "DATE", date_filter),
+    ])
+
+@st.cache_data(ttl=300)
+def load_daily_volume(symbols, date_filter):
+    """Daily volume per symbol for the volume chart, computed in BigQuery"""
+    if not symbols:
+        return pd.DataFrame()
+    query = f"""
+    SELECT 
+        date,
+        symbol,
+        SUM(volume) AS volume
+    FROM `{project_id}.{dataset}.{get_stock_table()}`
+    WHERE symbol IN UNNEST(@symbols)
+    AND date >= @since
+    GROUP BY date, symbol
+    ORDER BY date, symbol
+    """
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+        bigquery.ScalarQueryParameter("since", "DATE", date_filter),
+    ])
 
 @st.cache_data(ttl=300)
 def load_crypto_data(crypto_ids):
     if not crypto_ids:
         return pd.DataFrame()
-    crypto_str = "', '".join(crypto_ids)
     query = f"""
     SELECT 
         timestamp,
@@ -136,17 +273,19 @@ def load_crypto_data(crypto_ids):
         volume_24h,
         change_24h
     FROM `{project_id}.{dataset}.crypto_prices`
-    WHERE crypto_id IN ('{crypto_str}')
+    WHERE crypto_id IN UNNEST(@crypto_ids)
     ORDER BY timestamp DESC
     LIMIT 100
     """
-    return client.query(query).to_dataframe()
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("crypto_ids", "STRING", list(crypto_ids)),
+    ])
 
 @st.cache_data(ttl=300)
-def load_news_data(symbols):
+def load_news_articles(symbols, limit=20):
+    """Most recent articles for the news list"""
     if not symbols:
         return pd.DataFrame()
-    symbols_str = "', '".join(symbols)
     query = f"""
     SELECT 
         symbol,
@@ -157,11 +296,31 @@ def load_news_data(symbols):
         has_bullish,
         has_bearish
     FROM `{project_id}.{dataset}.market_news`
-    WHERE symbol IN ('{symbols_str}')
+    WHERE symbol IN UNNEST(@symbols)
     ORDER BY scraped_at DESC
-    LIMIT 20
+    LIMIT @limit
+    """
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+        bigquery.ScalarQueryParameter("limit", "INT64", limit),
+    ])
+
+@st.cache_data(ttl=1800)
+def load_news_sentiment(symbols):
+    """Bullish/bearish/total article counts, computed in BigQuery; sentiment moves slowly so cache longer"""
+    if not symbols:
+        return pd.DataFrame()
+    query = f"""
+    SELECT 
+        IFNULL(SUM(CAST(has_bullish AS INT64)), 0) AS bullish,
+        IFNULL(SUM(CAST(has_bearish AS INT64)), 0) AS bearish,
+        COUNT(*) AS total
+    FROM `{project_id}.{dataset}.market_news`
+    WHERE symbol IN UNNEST(@symbols)
     """
-    return client.query(query).to_dataframe()
+    return _run_query(query, [
+        bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+    ])
 
 @st.cache_data(ttl=300)
 def load_portfolio_data():
@@ -178,18 +337,37 @@ def load_portfolio_data():
     ORDER BY cost_basis DESC
     """
     try:
-        return client.query(query).to_dataframe()
+        return _run_query(query)
     except:
         return pd.DataFrame()
 
 # Load data
-date_filter = get_date_filter(date_range)
+# Sorted tuples and a plain date keep st.cache_data keys stable across reruns
+date_filter = get_date_filter(date_range).date()
+symbol_key = tuple(sorted(symbols))
+crypto_key = tuple(sorted(crypto_symbols))
+
+data_loads = [
+    (load_stock_data, symbol_key, date_filter),
+    (load_stock_summary, symbol_key, date_filter),
+    (load_daily_volume, symbol_key, date_filter),
+    (load_crypto_data, crypto_key),
+    (load_news_articles, symbol_key),
+    (load_news_sentiment, symbol_key),
+    (load_portfolio_data,),
+]
 
 try:
-    stock_df = load_stock_data(symbols, date_filter)
-    crypto_df = load_crypto_data(crypto_symbols)
-    news_df = load_news_data(symbols)
-    portfolio_df = load_portfolio_data()
+    # Run the BigQuery jobs concurrently; cached loads still return immediately.
+    # Worker threads get this rerun's script context so st.cache_data works in them.
+    with ThreadPoolExecutor(
+        max_workers=len(data_loads),
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx())
+    ) as pool:
+        futures = [pool.submit(*load) for load in data_loads]
+        (stock_df, stock_summary_df, daily_volume_df, crypto_df,
+         news_df, sentiment_df, portfolio_df) = [f.result() for f in futures]
 except Exception as e:
     st.error(f"Error loading data: {str(e)}")
     st.stop()
@@ -206,7 +384,7 @@ with tab1:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_change = stock_df.groupby('symbol')['price_change_pct'].mean().mean()
+            avg_change = stock_summary_df['avg_change'].mean()
             st.metric(
                 "Avg Price Change",
                 f"{avg_change:.2f}%",
@@ -214,21 +392,21 @@ with tab1:
             )
         
         with col2:
-            total_volume = stock_df.groupby('symbol')['volume'].sum().sum()
+            total_volume = stock_summary_df['total_volume'].sum()
             st.metric(
                 "Total Volume",
                 f"{total_volume/1e9:.2f}B"
             )
         
         with col3:
-            num_stocks = len(stock_df['symbol'].unique())
+            num_stocks = len(stock_summary_df)
             st.metric(
                 "Stocks Tracked",
                 num_stocks
             )
         
         with col4:
-            data_points = len(stock_df)
+            data_points = stock_summary_df['data_points'].sum()
             st.metric(
                 "Data Points",
                 f"{data_points:,}"
@@ -241,12 +419,17 @@ with tab1:
         
         fig = go.Figure()
         
-        for symbol in stock_df['symbol'].unique():
-            symbol_data = stock_df[stock_df['symbol'] == symbol].sort_values('date')
+        # Sort once and slice contiguous per-symbol blocks instead of masking per symbol
+        stock_by_symbol = dict(tuple(
+            stock_df.sort_values(['symbol', 'date'], kind='mergesort').groupby('symbol', sort=False)
+        ))
+        
+        for symbol, symbol_data in stock_by_symbol.items():
+            symbol_data = downsample(symbol_data, 'close')
             
-            fig.add_trace(go.Scatter(
-                x=symbol_data['date'],
-                y=symbol_data['close'],
+            fig.add_trace(go.Scattergl(
+                x=symbol_data['date'].to_numpy(),
+                y=symbol_data['close'].to_numpy(),
                 mode='lines',
                 name=symbol,
                 line=dict(width=2),
@@ -265,7 +448,7 @@ with tab1:
             template="plotly_white"
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Moving Averages
         col1, col2 = st.columns(2)
@@ -275,27 +458,29 @@ with tab1:
             
             if len(symbols) > 0:
                 selected_symbol = st.selectbox("Select stock for MA analysis", symbols)
-                symbol_data = stock_df[stock_df['symbol'] == selected_symbol].sort_values('date')
+                symbol_data = stock_by_symbol.get(selected_symbol, stock_df.iloc[:0])
+                symbol_data = downsample(symbol_data, 'close')
+                dates = symbol_data['date'].to_numpy()
                 
                 fig_ma = go.Figure()
                 
-                fig_ma.add_trace(go.Scatter(
-                    x=symbol_data['date'],
-                    y=symbol_data['close'],
+                fig_ma.add_trace(go.Scattergl(
+                    x=dates,
+                    y=symbol_data['close'].to_numpy(),
                     name='Close Price',
                     line=dict(color='blue', width=2)
                 ))
                 
-                fig_ma.add_trace(go.Scatter(
-                    x=symbol_data['date'],
-                    y=symbol_data['ma_7'],
+                fig_ma.add_trace(go.Scattergl(
+                    x=dates,
+                    y=symbol_data['ma_7'].to_numpy(),
                     name='7-Day MA',
                     line=dict(color='orange', width=1, dash='dash')
                 ))
                 
-                fig_ma.add_trace(go.Scatter(
-                    x=symbol_data['date'],
-                    y=symbol_data['ma_30'],
+                fig_ma.add_trace(go.Scattergl(
+                    x=dates,
+                    y=symbol_data['ma_30'].to_numpy(),
                     name='30-Day MA',
                     line=dict(color='red', width=1, dash='dash')
                 ))
@@ -308,7 +493,7 @@ with tab1:
                     template="plotly_white"
                 )
                 
-                st.plotly_chart(fig_ma, use_container_width=True)
+                st.plotly_chart(fig_ma, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         with col2:
             st.subheader("📊 Daily Returns Distribution")
@@ -327,34 +512,31 @@ with tab1:
                 showlegend=False
             )
             
-            st.plotly_chart(fig_dist, use_container_width=True)
+            st.plotly_chart(fig_dist, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Volume Chart
         st.subheader("📊 Trading Volume")
         
         fig_volume = px.bar(
-            stock_df.groupby(['date', 'symbol'])['volume'].sum().reset_index(),
+            daily_volume_df,
             x='date',
             y='volume',
             color='symbol',
             title="Daily Trading Volume",
-            barmode='group'
+            barmode='group' if len(symbol_key) > 1 else 'relative'
         )
+        fig_volume.update_traces(marker_line_width=0)
         
         fig_volume.update_layout(
             height=400,
             template="plotly_white"
         )
         
-        st.plotly_chart(fig_volume, use_container_width=True)
+        st.plotly_chart(fig_volume, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Data Table
         with st.expander("📋 View Raw Data"):
-            st.dataframe(
-                stock_df.sort_values('date', ascending=False),
-                use_container_width=True,
-                height=300
-            )
+            show_raw_data(stock_df, 'date', key='raw_stock', height=300)
     else:
         st.info("📊 Please select stocks from the sidebar to view data")
 
@@ -368,13 +550,17 @@ with tab2:
         
         cols = st.columns(len(latest_crypto))
         
-        for idx, (col, row) in enumerate(zip(cols, latest_crypto.itertuples())):
+        ids, prices, changes = [
+            latest_crypto[c].to_numpy() for c in ('crypto_id', 'price_usd', 'change_24h')
+        ]
+        
+        for col, crypto_id, price, change in zip(cols, ids, prices, changes):
             with col:
-                change_color = "normal" if row.change_24h >= 0 else "inverse"
+                change_color = "normal" if change >= 0 else "inverse"
                 st.metric(
-                    row.crypto_id.upper(),
-                    f"${row.price_usd:,.2f}",
-                    f"{row.change_24h:.2f}%",
+                    crypto_id.upper(),
+                    f"${price:,.2f}",
+                    f"{change:.2f}%",
                     delta_color=change_color
                 )
         
@@ -385,12 +571,11 @@ with tab2:
         
         fig_crypto = go.Figure()
         
-        for crypto_id in crypto_df['crypto_id'].unique():
-            crypto_data = crypto_df[crypto_df['crypto_id'] == crypto_id].sort_values('timestamp')
-            
-            fig_crypto.add_trace(go.Scatter(
-                x=crypto_data['timestamp'],
-                y=crypto_data['price_usd'],
+        sorted_crypto = crypto_df.sort_values(['crypto_id', 'timestamp'], kind='mergesort')
+        for crypto_id, crypto_data in sorted_crypto.groupby('crypto_id', sort=False):
+            fig_crypto.add_trace(go.Scattergl(
+                x=crypto_data['timestamp'].to_numpy(),
+                y=crypto_data['price_usd'].to_numpy(),
                 mode='lines+markers',
                 name=crypto_id.upper(),
                 line=dict(width=2)
@@ -405,7 +590,7 @@ with tab2:
             hovermode='x unified'
         )
         
-        st.plotly_chart(fig_crypto, use_container_width=True)
+        st.plotly_chart(fig_crypto, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Market cap and volume
         col1, col2 = st.columns(2)
@@ -418,8 +603,9 @@ with tab2:
                 title="Market Capitalization",
                 color='crypto_id'
             )
+            fig_market_cap.update_traces(marker_line_width=0)
             fig_market_cap.update_layout(height=400, showlegend=False, template="plotly_white")
-            st.plotly_chart(fig_market_cap, use_container_width=True)
+            st.plotly_chart(fig_market_cap, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         with col2:
             fig_volume = px.bar(
@@ -429,12 +615,13 @@ with tab2:
                 title="24h Trading Volume",
                 color='crypto_id'
             )
+            fig_volume.update_traces(marker_line_width=0)
             fig_volume.update_layout(height=400, showlegend=False, template="plotly_white")
-            st.plotly_chart(fig_volume, use_container_width=True)
+            st.plotly_chart(fig_volume, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Data table
         with st.expander("📋 View Crypto Data"):
-            st.dataframe(crypto_df.sort_values('timestamp', ascending=False), use_container_width=True)
+            show_raw_data(crypto_df, 'timestamp', key='raw_crypto')
     else:
         st.info("💰 Please select cryptocurrencies from the sidebar to view data")
 
@@ -446,24 +633,26 @@ with tab3:
         # Sentiment analysis
         col1, col2, col3 = st.columns(3)
         
+        sentiment = sentiment_df.iloc[0]
+        bullish_count = int(sentiment['bullish'])
+        bearish_count = int(sentiment['bearish'])
+        neutral_count = int(sentiment['total']) - bullish_count - bearish_count
+        
         with col1:
-            bullish_count = news_df['has_bullish'].sum()
-            st.metric("🐂 Bullish Articles", int(bullish_count))
+            st.metric("🐂 Bullish Articles", bullish_count)
         
         with col2:
-            bearish_count = news_df['has_bearish'].sum()
-            st.metric("🐻 Bearish Articles", int(bearish_count))
+            st.metric("🐻 Bearish Articles", bearish_count)
         
         with col3:
-            neutral_count = len(news_df) - bullish_count - bearish_count
-            st.metric("😐 Neutral Articles", int(neutral_count))
+            st.metric("😐 Neutral Articles", neutral_count)
         
         st.markdown("---")
         
         # Sentiment distribution
         sentiment_data = pd.DataFrame({
             'Sentiment': ['Bullish', 'Bearish', 'Neutral'],
-            'Count': [int(bullish_count), int(bearish_count), int(neutral_count)]
+            'Count': [bullish_count, bearish_count, neutral_count]
         })
         
         fig_sentiment = px.pie(
@@ -475,27 +664,29 @@ with tab3:
             color_discrete_map={'Bullish': 'green', 'Bearish': 'red', 'Neutral': 'gray'}
         )
         fig_sentiment.update_layout(height=400)
-        st.plotly_chart(fig_sentiment, use_container_width=True)
+        st.plotly_chart(fig_sentiment, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         st.markdown("---")
         
         # News articles
         st.subheader("📰 Recent Articles")
         
-        for idx, row in news_df.iterrows():
-            sentiment_emoji = "🐂" if row['has_bullish'] else "🐻" if row['has_bearish'] else "😐"
-            
-            with st.container():
-                col1, col2 = st.columns([4, 1])
-                
-                with col1:
-                    st.markdown(f"### {sentiment_emoji} {row['title']}")
-                    st.caption(f"**{row['symbol']}** | {row['source']} | {row['scraped_at'].strftime('%Y-%m-%d %H:%M')}")
-                
-                with col2:
-                    st.markdown(f"[Read More]({row['url']})")
-                
-                st.markdown("---")
+        # Build every article's markdown column-wise and send it as one element
+        bullish = news_df['has_bullish'].astype('boolean').fillna(False).to_numpy(bool)
+        bearish = news_df['has_bearish'].astype('boolean').fillna(False).to_numpy(bool)
+        sentiment_emoji = pd.Series(
+            np.where(bullish, "🐂", np.where(bearish, "🐻", "😐")),
+            index=news_df.index
+        )
+        
+        articles_md = (
+            "### " + sentiment_emoji + " " + news_df['title'] + "\n\n"
+            + "**" + news_df['symbol'] + "** | " + news_df['source'].fillna('')
+            + " | " + news_df['scraped_at'].dt.strftime('%Y-%m-%d %H:%M')
+            + " | [Read More](" + news_df['url'].fillna('') + ")"
+        )
+        
+        st.markdown(articles_md.str.cat(sep="\n\n---\n\n") + "\n\n---")
     else:
         st.info("📰 No news data available. Run the ETL pipeline to fetch news.")
 
@@ -532,7 +723,7 @@ with tab4:
                 title="Portfolio Allocation by Value"
             )
             fig_allocation.update_layout(height=400)
-            st.plotly_chart(fig_allocation, use_container_width=True)
+            st.plotly_chart(fig_allocation, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         with col2:
             fig_type = px.pie(
@@ -542,7 +733,7 @@ with tab4:
                 title="Asset Type Distribution"
             )
             fig_type.update_layout(height=400)
-            st.plotly_chart(fig_type, use_container_width=True)
+            st.plotly_chart(fig_type, use_container_width=True, theme=None, config=CHART_CONFIG)
         
         # Holdings table
         st.subheader("📊 Holdings Details")
@@ -550,12 +741,19 @@ with tab4:
         portfolio_display = portfolio_df[[
             'symbol', 'asset_type', 'quantity', 'purchase_price', 
             'cost_basis', 'purchase_date', 'holding_days'
-        ]].copy()
-        
-        portfolio_display['purchase_price'] = portfolio_display['purchase_price'].apply(lambda x: f"${x:,.2f}")
-        portfolio_display['cost_basis'] = portfolio_display['cost_basis'].apply(lambda x: f"${x:,.2f}")
-        
-        st.dataframe(portfolio_display, use_container_width=True)
+        ]]
+        
+        # Format in the Styler so the columns keep their dtypes (and sort numerically);
+        # a Styler drops st.dataframe's own display defaults, so format every non-text column
+        st.dataframe(
+            portfolio_display.style.format({
+                'quantity': '{:,.8g}',
+                'purchase_price': '${:,.2f}',
+                'cost_basis': '${:,.2f}',
+                'purchase_date': lambda d: d.strftime('%Y-%m-%d'),
+            }, na_rep=''),
+            use_container_width=True
+        )
     else:
         st.info("💼 No portfolio data available. Set up the PostgreSQL database to view your portfolio.")
         
@@ -1,19 +1,29 @@
 import sys
 sys.path.append('src')
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from extract.stock_api import StockDataExtractor
 from extract.news_scraper import NewsScraper
 from transform.data_transformer import DataTransformer
 from load.bigquery_loader import BigQueryLoader
+from common.config import get_config
 from dotenv import load_dotenv
 import os
-import yaml
+import time
+import pandas as pd
 
 load_dotenv()
 
+# Alpha Vantage free tier allows 5 calls/min: at most CALLS_PER_WINDOW request
+# starts in any WINDOW_SECONDS; MAX_WORKERS only bounds how many can overlap
+CALLS_PER_WINDOW = 5
+WINDOW_SECONDS = 60
+MAX_WORKERS = 5
+
 # Load config
-with open('config/config.yaml', 'r') as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
 print("=" * 60)
 print("EXTRACTING ALL STOCKS")
@@ -25,15 +35,19 @@ symbols = config['stocks']['symbols']
 
 print(f"\nExtracting data for: {', '.join(symbols)}")
 
-all_stock_data = []
-for symbol in symbols:
-    print(f"\n📊 Extracting {symbol}...")
-    df = extractor.get_daily_prices(symbol)
-    if not df.empty:
-        all_stock_data.append(df)
+# Sliding window over request starts: the first CALLS_PER_WINDOW go out at once,
+# later ones wait until the oldest start in the window is WINDOW_SECONDS old
+with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(symbols))) as executor:
+    futures = []
+    starts = deque(maxlen=CALLS_PER_WINDOW)
+    for symbol in symbols:
+        if len(starts) == CALLS_PER_WINDOW:
+            time.sleep(max(0, starts[0] + WINDOW_SECONDS - time.monotonic()))
+        starts.append(time.monotonic())
+        futures.append(executor.submit(extractor.get_daily_prices, symbol))
+    all_stock_data = [df for df in (f.result() for f in futures) if not df.empty]
 
 if all_stock_data:
-    import pandas as pd
     stock_df = pd.concat(all_stock_data, ignore_index=True)
     
     # Transform
@@ -54,21 +68,11 @@ print("\n" + "=" * 60)
 print("EXTRACTING NEWS")
 print("=" * 60)
 
-scraper = NewsScraper()
-all_news = []
+# Yahoo Finance first, Finviz as fallback; symbols scraped concurrently (bounded)
+with NewsScraper() as scraper:
+    news_df = scraper.scrape_multiple_symbols(symbols)
 
-for symbol in symbols:
-    print(f"\n📰 Scraping news for {symbol}...")
-    news_df = scraper.scrape_yahoo_finance(symbol)
-    if news_df.empty:
-        news_df = scraper.scrape_finviz_news(symbol)
-    if not news_df.empty:
-        all_news.append(news_df)
-
-if all_news:
-    import pandas as pd
-    news_df = pd.concat(all_news, ignore_index=True)
-    
+if not news_df.empty:
     # Transform
     print("\n🔄 Transforming news...")
     news_transformed = transformer.transform_news_data(news_df)
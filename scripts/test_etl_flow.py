@@ -8,9 +8,9 @@ from extract.news_scraper import NewsScraper
 from extract.portfolio_db import PortfolioDatabase
 from transform.data_transformer import DataTransformer
 from load.bigquery_loader import BigQueryLoader
+from common.config import get_config
 from dotenv import load_dotenv
 import os
-import yaml
 
 load_dotenv()
 
@@ -22,8 +22,7 @@ def test_etl():
     print("=" * 60)
     
     # Load config
-    with open('config/config.yaml', 'r') as f:
-        config = yaml.safe_load(f)
+    config = get_config()
     
     # Initialize components
     stock_extractor = StockDataExtractor()
@@ -0,0 +1,11 @@
+import yaml
+from functools import lru_cache
+
+# LibYAML's C loader when PyYAML was built with it, pure-Python otherwise
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@lru_cache(maxsize=None)
+def get_config(path='config/config.yaml'):
+    """Load the pipeline YAML config once per process and path"""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_Loader)
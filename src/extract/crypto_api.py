@@ -1,11 +1,51 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime
 import time
 
+# CoinGecko /simple/price fields -> our column names
+PRICE_COLUMNS = {
+    'usd': 'price_usd',
+    'usd_market_cap': 'market_cap',
+    'usd_24h_vol': 'volume_24h',
+    'usd_24h_change': 'change_24h',
+}
+
+# Upper bound in seconds for any single retry backoff
+MAX_BACKOFF = 30
+
 class CryptoDataExtractor:
-    def __init__(self):
+    def __init__(self, max_retries=3, base_delay=0.5):
         self.base_url = 'https://api.coingecko.com/api/v3'
+        
+        # Keep-alive connection pool to CoinGecko, retrying rate limits and server
+        # errors with jittered exponential backoff (honouring Retry-After)
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=max_retries,
+                backoff_factor=base_delay,
+                backoff_jitter=base_delay,
+                backoff_max=MAX_BACKOFF,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+                allowed_methods=['GET']
+            )
+        ))
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def get_current_prices(self, crypto_ids):
         """Get current prices for cryptocurrencies"""
@@ -18,26 +58,27 @@ class CryptoDataExtractor:
                 'include_24hr_vol': 'true'
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f'{self.base_url}/simple/price',
-                params=params
+                params=params,
+                timeout=(3, 10)
             )
             response.raise_for_status()
             data = response.json()
             
-            # Convert to DataFrame
-            records = []
-            for crypto_id, values in data.items():
-                records.append({
-                    'crypto_id': crypto_id,
-                    'price_usd': values.get('usd', 0),
-                    'market_cap': values.get('usd_market_cap', 0),
-                    'volume_24h': values.get('usd_24h_vol', 0),
-                    'change_24h': values.get('usd_24h_change', 0),
-                    'timestamp': datetime.now()
-                })
-            
-            df = pd.DataFrame(records)
+            # One row per coin id; absent fields default to 0, but explicit nulls stay
+            # null so the transform drops them instead of loading a $0 price
+            fields = {
+                crypto_id: {key: values.get(key, 0) for key in PRICE_COLUMNS}
+                for crypto_id, values in data.items()
+            }
+            df = (
+                pd.DataFrame.from_dict(fields, orient='index', columns=list(PRICE_COLUMNS))
+                .rename(columns=PRICE_COLUMNS)
+                .rename_axis('crypto_id')
+                .reset_index()
+            )
+            df['timestamp'] = datetime.now()
             print(f"✅ Extracted data for {len(df)} cryptocurrencies")
             return df
             
@@ -53,9 +94,10 @@ class CryptoDataExtractor:
                 'days': days
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f'{self.base_url}/coins/{crypto_id}/market_chart',
-                params=params
+                params=params,
+                timeout=(3, 10)
             )
             response.raise_for_status()
             data = response.json()
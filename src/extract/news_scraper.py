@@ -1,27 +1,85 @@
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
 import pandas as pd
 from datetime import datetime
-import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+# libxml2-backed parser; much faster than the pure-Python 'html.parser'
+HTML_PARSER = 'lxml'
+
+# Only build soup for the tags each page's lookups use (whole subtrees are kept)
+YAHOO_STRAINER = SoupStrainer(['h3', 'a', 'section'])
+MARKETWATCH_STRAINER = SoupStrainer('a')
+
+# Concurrent page fetches per scraper, in place of a fixed sleep between symbols
+MAX_CONCURRENT_REQUESTS = 5
+
+# Upper bound in seconds for any single retry backoff
+MAX_BACKOFF = 30
+
+# First link of each of the first 10 Finviz news-table rows, in one libxml2 pass
+FINVIZ_NEWS_XPATH = (
+    "((//table[contains(concat(' ', normalize-space(@class), ' '), ' fullview-news-outer ')])[1]"
+    "//tr)[position() <= 10]/descendant::a[1]"
+)
+
+# Column order of every article frame; also gives empty results a proper schema
+ARTICLE_COLUMNS = ['symbol', 'title', 'url', 'source', 'scraped_at']
 
 class NewsScraper:
-    def __init__(self):
+    def __init__(self, session=None, max_retries=3, base_delay=1.0):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Shared keep-alive session; safe to use from several scraping threads.
+        # Transient HTTP errors are retried with jittered exponential backoff.
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=Retry(
+                total=max_retries,
+                backoff_factor=base_delay,
+                backoff_jitter=base_delay,
+                backoff_max=MAX_BACKOFF,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+                allowed_methods=['GET']
+            ))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.session.headers.update(self.headers)
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def scrape_yahoo_finance(self, symbol):
         """Scrape news from Yahoo Finance - Updated for new structure"""
+        return pd.DataFrame.from_records(self.scrape_yahoo_articles(symbol), columns=ARTICLE_COLUMNS)
+    
+    def scrape_yahoo_articles(self, symbol):
+        """Scrape Yahoo Finance news as a list of article dicts"""
         # Use the main quote page which has news
         url = f'https://finance.yahoo.com/quote/{symbol}'
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=YAHOO_STRAINER)
             
             articles = []
+            scraped_at = datetime.now()
             
             # Method 1: Try to find news section
             news_items = soup.find_all('h3', class_='Mb(5px)')
@@ -58,7 +116,7 @@ class NewsScraper:
                             'title': title,
                             'url': link,
                             'source': 'Yahoo Finance',
-                            'scraped_at': datetime.now()
+                            'scraped_at': scraped_at
                         })
                 except Exception as e:
                     continue
@@ -66,11 +124,10 @@ class NewsScraper:
             # If still no articles, use alternative news source
             if len(articles) == 0:
                 print(f"⚠️  Yahoo Finance scraping failed, trying alternative source...")
-                articles = self._scrape_alternative_source(symbol)
+                return self._scrape_alternative_source(symbol)
             
-            df = pd.DataFrame(articles)
-            print(f"✅ Scraped {len(df)} news articles for {symbol}")
-            return df
+            print(f"✅ Scraped {len(articles)} news articles for {symbol}")
+            return articles
             
         except Exception as e:
             print(f"❌ Error scraping news for {symbol}: {str(e)}")
@@ -78,15 +135,16 @@ class NewsScraper:
             return self._scrape_alternative_source(symbol)
     
     def _scrape_alternative_source(self, symbol):
-        """Scrape from MarketWatch as alternative"""
+        """Scrape article dicts from MarketWatch as alternative"""
         url = f'https://www.marketwatch.com/investing/stock/{symbol.lower()}'
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=MARKETWATCH_STRAINER)
             
             articles = []
+            scraped_at = datetime.now()
             
             # Find news headlines
             news_items = soup.find_all('a', class_='link')
@@ -108,80 +166,72 @@ class NewsScraper:
                             'title': title,
                             'url': link,
                             'source': 'MarketWatch',
-                            'scraped_at': datetime.now()
+                            'scraped_at': scraped_at
                         })
                 except Exception:
                     continue
             
-            df = pd.DataFrame(articles)
-            print(f"✅ Scraped {len(df)} news articles from MarketWatch for {symbol}")
-            return df
+            print(f"✅ Scraped {len(articles)} news articles from MarketWatch for {symbol}")
+            return articles
             
         except Exception as e:
             print(f"❌ Alternative source also failed: {str(e)}")
-            return pd.DataFrame()
+            return []
     
     def scrape_finviz_news(self, symbol):
         """Scrape from Finviz (another alternative)"""
+        return pd.DataFrame.from_records(self.scrape_finviz_articles(symbol), columns=ARTICLE_COLUMNS)
+    
+    def scrape_finviz_articles(self, symbol):
+        """Scrape Finviz news as a list of article dicts"""
         url = f'https://finviz.com/quote.ashx?t={symbol}'
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            articles = []
-            news_table = soup.find('table', class_='fullview-news-outer')
-            
-            if news_table:
-                rows = news_table.find_all('tr')
-                
-                for row in rows[:10]:
-                    try:
-                        link_tag = row.find('a')
-                        if link_tag:
-                            title = link_tag.get_text().strip()
-                            link = link_tag.get('href', '')
-                            
-                            if title and link:
-                                articles.append({
-                                    'symbol': symbol,
-                                    'title': title,
-                                    'url': link,
-                                    'source': 'Finviz',
-                                    'scraped_at': datetime.now()
-                                })
-                    except Exception:
-                        continue
-            
-            df = pd.DataFrame(articles)
-            print(f"✅ Scraped {len(df)} news articles from Finviz for {symbol}")
-            return df
+            doc = lxml.html.fromstring(response.content)
+            
+            scraped_at = datetime.now()
+            links = [(a.text_content().strip(), a.get('href', '')) for a in doc.xpath(FINVIZ_NEWS_XPATH)]
+            articles = [
+                {
+                    'symbol': symbol,
+                    'title': title,
+                    'url': link,
+                    'source': 'Finviz',
+                    'scraped_at': scraped_at
+                }
+                for title, link in links
+                if title and link
+            ]
+            
+            print(f"✅ Scraped {len(articles)} news articles from Finviz for {symbol}")
+            return articles
             
         except Exception as e:
             print(f"❌ Finviz scraping failed: {str(e)}")
-            return pd.DataFrame()
+            return []
+    
+    def scrape_symbol_articles(self, symbol):
+        """Scrape article dicts for one symbol, Yahoo first then Finviz"""
+        articles = self.scrape_yahoo_articles(symbol)
+        if not articles:
+            articles = self.scrape_finviz_articles(symbol)
+        return articles
     
     def scrape_multiple_symbols(self, symbols):
         """Scrape news for multiple symbols"""
-        all_news = []
+        if not symbols:
+            return pd.DataFrame(columns=ARTICLE_COLUMNS)
         
-        for symbol in symbols:
-            # Try Yahoo first
-            df = self.scrape_yahoo_finance(symbol)
-            
-            # If Yahoo fails, try Finviz
-            if df.empty:
-                df = self.scrape_finviz_news(symbol)
-            
-            if not df.empty:
-                all_news.append(df)
-            
-            time.sleep(2)  # Be respectful to servers
+        # Network-bound: fan out over the pooled session, bounded to stay polite
+        workers = min(MAX_CONCURRENT_REQUESTS, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(self.scrape_symbol_articles, symbols)
+            all_articles = list(chain.from_iterable(results))
         
-        if all_news:
-            return pd.concat(all_news, ignore_index=True)
-        return pd.DataFrame()
+        # One DataFrame built from all records, no per-symbol frames to concat
+        return pd.DataFrame.from_records(all_articles, columns=ARTICLE_COLUMNS)
 
 # Test
 if __name__ == "__main__":
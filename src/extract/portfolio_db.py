@@ -1,10 +1,14 @@
 
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 import pandas as pd
 from datetime import datetime, timedelta
 import random
 
+# Rows per round trip when streaming query results from a server-side cursor
+FETCH_BATCH_SIZE = 50000
+
 class PortfolioDatabase:
     def __init__(self, config):
         self.config = config
@@ -35,7 +39,8 @@ class PortfolioDatabase:
             purchase_price DECIMAL(18, 2),
             purchase_date DATE,
             asset_type VARCHAR(20),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT uq_holding UNIQUE (user_id, symbol, purchase_date)
         );
         
         CREATE TABLE IF NOT EXISTS transactions (
@@ -50,13 +55,35 @@ class PortfolioDatabase:
         );
         """
         
+        # One-off migration for tables created before uq_holding existed: drop repeated
+        # holdings (keeping the oldest row) so the same uniqueness can be added as an index
+        index_exists_query = "SELECT to_regclass('uq_holding') IS NOT NULL;"
+        dedupe_query = """
+        DELETE FROM user_portfolio a
+        USING user_portfolio b
+        WHERE a.id > b.id
+        AND (a.user_id, a.symbol, a.purchase_date) = (b.user_id, b.symbol, b.purchase_date);
+        """
+        unique_index_query = """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_holding
+            ON user_portfolio (user_id, symbol, purchase_date);
+        """
+        
         try:
             cursor = self.conn.cursor()
             cursor.execute(create_table_query)
             self.conn.commit()
+            
+            cursor.execute(index_exists_query)
+            if not cursor.fetchone()[0]:
+                cursor.execute(dedupe_query)
+                print(f"⚠️  Removed {cursor.rowcount} duplicate holdings before adding uq_holding")
+                cursor.execute(unique_index_query)
+                self.conn.commit()
             cursor.close()
             print("✅ Tables created successfully")
         except Exception as e:
+            self.conn.rollback()
             print(f"❌ Error creating tables: {str(e)}")
     
     def insert_sample_data(self):
@@ -69,19 +96,25 @@ class PortfolioDatabase:
             (1, 'ethereum', 2, 2500.00, '2024-02-05', 'crypto'),
         ]
         
+        # execute_values sends one multi-row INSERT per page instead of one per row;
+        # use the same pattern for any larger seed load
         insert_query = """
         INSERT INTO user_portfolio (user_id, symbol, quantity, purchase_price, purchase_date, asset_type)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT DO NOTHING;
+        VALUES %s
+        ON CONFLICT (user_id, symbol, purchase_date) DO UPDATE
+        SET quantity = EXCLUDED.quantity,
+            purchase_price = EXCLUDED.purchase_price,
+            asset_type = EXCLUDED.asset_type;
         """
         
         try:
             cursor = self.conn.cursor()
-            cursor.executemany(insert_query, sample_holdings)
+            execute_values(cursor, insert_query, sample_holdings, page_size=1000)
             self.conn.commit()
             cursor.close()
             print(f"✅ Inserted {len(sample_holdings)} sample holdings")
         except Exception as e:
+            self.conn.rollback()
             print(f"❌ Error inserting data: {str(e)}")
     
     def extract_portfolio_data(self):
@@ -100,7 +133,10 @@ class PortfolioDatabase:
         """
         
         try:
-            df = pd.read_sql(query, self.conn)
+            df = self._read_query(query)
+            # DECIMAL columns arrive as exact Decimal objects; round once to float64,
+            # the type they are stored as in BigQuery
+            df = df.astype({'quantity': 'float64', 'purchase_price': 'float64'})
             df['extraction_timestamp'] = datetime.now()
             print(f"✅ Extracted {len(df)} portfolio records")
             return df
@@ -108,6 +144,24 @@ class PortfolioDatabase:
             print(f"❌ Error extracting portfolio: {str(e)}")
             return pd.DataFrame()
     
+    def _read_query(self, query):
+        """Stream a query through a server-side cursor into a DataFrame"""
+        frames = []
+        with self.conn.cursor(name='portfolio_extract') as cursor:
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                # Named cursors only expose description after the first fetch
+                columns = [col.name for col in cursor.description]
+                if not rows:
+                    break
+                frames.append(pd.DataFrame.from_records(rows, columns=columns))
+        self.conn.commit()
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+    
     def close(self):
         """Close connection"""
         if self.conn:
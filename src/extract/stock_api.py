@@ -1,16 +1,55 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime, timedelta
+import random
 import time
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Upper bound in seconds for any single retry backoff
+MAX_BACKOFF = 30
+
+# Alpha Vantage's free-tier quota is per minute; a rate-limit note only clears
+# once the window rolls over
+QUOTA_WINDOW = 60
+
+# (connect, read) seconds, so a hung connection can't stall the extract
+REQUEST_TIMEOUT = (3, 10)
+
 class StockDataExtractor:
-    def __init__(self):
+    def __init__(self, max_retries=3, base_delay=1.0):
         self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.base_url = 'https://www.alphavantage.co/query'
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        # Reuse keep-alive connections across symbols (and concurrent callers);
+        # transient HTTP errors are retried with jittered exponential backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=Retry(
+            total=max_retries,
+            backoff_factor=base_delay,
+            backoff_jitter=base_delay,
+            backoff_max=MAX_BACKOFF,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=['GET']
+        ))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def get_daily_prices(self, symbol):
         """Extract daily stock prices"""
@@ -22,29 +61,25 @@ class StockDataExtractor:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(params, symbol)
             
             if 'Time Series (Daily)' not in data:
                 print(f"Error for {symbol}: {data.get('Note', data.get('Error Message', 'Unknown error'))}")
                 return pd.DataFrame()
             
-            # Convert to DataFrame
+            # Convert to DataFrame from plain row lists (bars are keyed "1. open" .. "5. volume")
             time_series = data['Time Series (Daily)']
-            df = pd.DataFrame.from_dict(time_series, orient='index')
-            
-            # Clean column names
-            df.columns = ['open', 'high', 'low', 'close', 'volume']
-            df.index.name = 'date'
-            df.reset_index(inplace=True)
+            df = pd.DataFrame(
+                [list(bar.values()) for bar in time_series.values()],
+                columns=['open', 'high', 'low', 'close', 'volume']
+            )
+            df.insert(0, 'date', pd.to_datetime(list(time_series), format='%Y-%m-%d'))
             
             # Add metadata
             df['symbol'] = symbol
             df['extraction_timestamp'] = datetime.now()
             
             # Convert types
-            df['date'] = pd.to_datetime(df['date'])
             for col in ['open', 'high', 'low', 'close', 'volume']:
                 df[col] = pd.to_numeric(df[col])
             
@@ -55,6 +90,22 @@ class StockDataExtractor:
             print(f"❌ Error extracting {symbol}: {str(e)}")
             return pd.DataFrame()
     
+    def _get_json(self, params, symbol):
+        """GET the API, backing off while Alpha Vantage answers with a rate-limit note"""
+        for attempt in range(self.max_retries + 1):
+            response = self.session.get(self.base_url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Rate limiting comes back as HTTP 200 with a 'Note' instead of data
+            if 'Note' not in data or attempt == self.max_retries:
+                return data
+            
+            # Retrying sooner just spends another call from the same exhausted quota
+            delay = QUOTA_WINDOW + random.uniform(0, self.base_delay)
+            print(f"⚠️  Rate limited on {symbol}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
     def get_multiple_stocks(self, symbols):
         """Extract data for multiple stocks"""
         all_data = []
@@ -5,6 +5,96 @@ import pandas as pd
 from datetime import datetime
 import os
 
+# Table 1: Stock Prices
+STOCK_SCHEMA = [
+    bigquery.SchemaField("date", "DATE", mode="REQUIRED"),
+    bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("open", "FLOAT64"),
+    bigquery.SchemaField("high", "FLOAT64"),
+    bigquery.SchemaField("low", "FLOAT64"),
+    bigquery.SchemaField("close", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("volume", "INTEGER"),
+    bigquery.SchemaField("daily_return", "FLOAT64"),
+    bigquery.SchemaField("price_range", "FLOAT64"),
+    bigquery.SchemaField("price_change", "FLOAT64"),
+    bigquery.SchemaField("price_change_pct", "FLOAT64"),
+    bigquery.SchemaField("ma_7", "FLOAT64"),
+    bigquery.SchemaField("ma_30", "FLOAT64"),
+    bigquery.SchemaField("volatility_30d", "FLOAT64"),
+    bigquery.SchemaField("extraction_timestamp", "TIMESTAMP"),
+    bigquery.SchemaField("transformed_at", "TIMESTAMP"),
+]
+
+# Table 2: Crypto Prices
+CRYPTO_SCHEMA = [
+    bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("crypto_id", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("price_usd", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("market_cap", "FLOAT64"),
+    bigquery.SchemaField("volume_24h", "FLOAT64"),
+    bigquery.SchemaField("change_24h", "FLOAT64"),
+    bigquery.SchemaField("price_category", "STRING"),
+    bigquery.SchemaField("transformed_at", "TIMESTAMP"),
+]
+
+# Table 3: Market News
+NEWS_SCHEMA = [
+    bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("title", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("url", "STRING"),
+    bigquery.SchemaField("source", "STRING"),
+    bigquery.SchemaField("title_length", "INTEGER"),
+    bigquery.SchemaField("has_earnings", "BOOLEAN"),
+    bigquery.SchemaField("has_merger", "BOOLEAN"),
+    bigquery.SchemaField("has_acquisition", "BOOLEAN"),
+    bigquery.SchemaField("has_revenue", "BOOLEAN"),
+    bigquery.SchemaField("has_profit", "BOOLEAN"),
+    bigquery.SchemaField("has_loss", "BOOLEAN"),
+    bigquery.SchemaField("has_growth", "BOOLEAN"),
+    bigquery.SchemaField("has_decline", "BOOLEAN"),
+    bigquery.SchemaField("has_bullish", "BOOLEAN"),
+    bigquery.SchemaField("has_bearish", "BOOLEAN"),
+    bigquery.SchemaField("scraped_at", "TIMESTAMP"),
+    bigquery.SchemaField("transformed_at", "TIMESTAMP"),
+]
+
+# Table 4: User Portfolio
+PORTFOLIO_SCHEMA = [
+    bigquery.SchemaField("user_id", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("quantity", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("purchase_price", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("purchase_date", "DATE"),
+    bigquery.SchemaField("asset_type", "STRING"),
+    bigquery.SchemaField("cost_basis", "FLOAT64"),
+    bigquery.SchemaField("holding_days", "INTEGER"),
+    bigquery.SchemaField("created_at", "TIMESTAMP"),
+    bigquery.SchemaField("extraction_timestamp", "TIMESTAMP"),
+    bigquery.SchemaField("transformed_at", "TIMESTAMP"),
+]
+
+# Table 5: Pipeline Metrics (for monitoring)
+METRICS_SCHEMA = [
+    bigquery.SchemaField("pipeline_run_id", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("table_name", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("records_extracted", "INTEGER"),
+    bigquery.SchemaField("records_transformed", "INTEGER"),
+    bigquery.SchemaField("records_loaded", "INTEGER"),
+    bigquery.SchemaField("errors", "INTEGER"),
+    bigquery.SchemaField("execution_time_seconds", "FLOAT64"),
+    bigquery.SchemaField("status", "STRING"),
+    bigquery.SchemaField("error_message", "STRING"),
+    bigquery.SchemaField("run_timestamp", "TIMESTAMP", mode="REQUIRED"),
+]
+
+TABLE_SCHEMAS = {
+    'stock_prices': STOCK_SCHEMA,
+    'crypto_prices': CRYPTO_SCHEMA,
+    'market_news': NEWS_SCHEMA,
+    'user_portfolio': PORTFOLIO_SCHEMA,
+    'pipeline_metrics': METRICS_SCHEMA
+}
+
 class BigQueryLoader:
     def __init__(self, project_id, dataset_id):
         """Initialize BigQuery client"""
@@ -12,102 +102,28 @@ class BigQueryLoader:
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.dataset_ref = f"{project_id}.{dataset_id}"
+        self._metrics_buffer = []
     
     def create_tables(self):
         """Create all necessary tables with proper schemas"""
-        
-        # Table 1: Stock Prices
-        stock_schema = [
-            bigquery.SchemaField("date", "DATE", mode="REQUIRED"),
-            bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("open", "FLOAT64"),
-            bigquery.SchemaField("high", "FLOAT64"),
-            bigquery.SchemaField("low", "FLOAT64"),
-            bigquery.SchemaField("close", "FLOAT64", mode="REQUIRED"),
-            bigquery.SchemaField("volume", "INTEGER"),
-            bigquery.SchemaField("daily_return", "FLOAT64"),
-            bigquery.SchemaField("price_range", "FLOAT64"),
-            bigquery.SchemaField("price_change", "FLOAT64"),
-            bigquery.SchemaField("price_change_pct", "FLOAT64"),
-            bigquery.SchemaField("ma_7", "FLOAT64"),
-            bigquery.SchemaField("ma_30", "FLOAT64"),
-            bigquery.SchemaField("volatility_30d", "FLOAT64"),
-            bigquery.SchemaField("extraction_timestamp", "TIMESTAMP"),
-            bigquery.SchemaField("transformed_at", "TIMESTAMP"),
-        ]
-        
-        # Table 2: Crypto Prices
-        crypto_schema = [
-            bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("crypto_id", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("price_usd", "FLOAT64", mode="REQUIRED"),
-            bigquery.SchemaField("market_cap", "FLOAT64"),
-            bigquery.SchemaField("volume_24h", "FLOAT64"),
-            bigquery.SchemaField("change_24h", "FLOAT64"),
-            bigquery.SchemaField("price_category", "STRING"),
-            bigquery.SchemaField("transformed_at", "TIMESTAMP"),
-        ]
-        
-        # Table 3: Market News
-        news_schema = [
-            bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("title", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("url", "STRING"),
-            bigquery.SchemaField("source", "STRING"),
-            bigquery.SchemaField("title_length", "INTEGER"),
-            bigquery.SchemaField("has_earnings", "BOOLEAN"),
-            bigquery.SchemaField("has_merger", "BOOLEAN"),
-            bigquery.SchemaField("has_acquisition", "BOOLEAN"),
-            bigquery.SchemaField("has_revenue", "BOOLEAN"),
-            bigquery.SchemaField("has_profit", "BOOLEAN"),
-            bigquery.SchemaField("has_loss", "BOOLEAN"),
-            bigquery.SchemaField("has_growth", "BOOLEAN"),
-            bigquery.SchemaField("has_decline", "BOOLEAN"),
-            bigquery.SchemaField("has_bullish", "BOOLEAN"),
-            bigquery.SchemaField("has_bearish", "BOOLEAN"),
-            bigquery.SchemaField("scraped_at", "TIMESTAMP"),
-            bigquery.SchemaField("transformed_at", "TIMESTAMP"),
-        ]
-        
-        # Table 4: User Portfolio
-        portfolio_schema = [
-            bigquery.SchemaField("user_id", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("symbol", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("quantity", "FLOAT64", mode="REQUIRED"),
-            bigquery.SchemaField("purchase_price", "FLOAT64", mode="REQUIRED"),
-            bigquery.SchemaField("purchase_date", "DATE"),
-            bigquery.SchemaField("asset_type", "STRING"),
-            bigquery.SchemaField("cost_basis", "FLOAT64"),
-            bigquery.SchemaField("holding_days", "INTEGER"),
-            bigquery.SchemaField("created_at", "TIMESTAMP"),
-            bigquery.SchemaField("extraction_timestamp", "TIMESTAMP"),
-            bigquery.SchemaField("transformed_at", "TIMESTAMP"),
-        ]
-        
-        # Table 5: Pipeline Metrics (for monitoring)
-        metrics_schema = [
-            bigquery.SchemaField("pipeline_run_id", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("table_name", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("records_extracted", "INTEGER"),
-            bigquery.SchemaField("records_transformed", "INTEGER"),
-            bigquery.SchemaField("records_loaded", "INTEGER"),
-            bigquery.SchemaField("errors", "INTEGER"),
-            bigquery.SchemaField("execution_time_seconds", "FLOAT64"),
-            bigquery.SchemaField("status", "STRING"),
-            bigquery.SchemaField("error_message", "STRING"),
-            bigquery.SchemaField("run_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
-        
-        tables = {
-            'stock_prices': stock_schema,
-            'crypto_prices': crypto_schema,
-            'market_news': news_schema,
-            'user_portfolio': portfolio_schema,
-            'pipeline_metrics': metrics_schema
-        }
-        
-        for table_name, schema in tables.items():
+        for table_name, schema in TABLE_SCHEMAS.items():
             self._create_table(table_name, schema)
+        
+        self.create_views()
+    
+    def create_views(self):
+        """Create the materialized views the dashboard reads from"""
+        # Dashboard read path: only the columns it charts, clustered by symbol
+        self._create_materialized_view(
+            'stock_prices_daily',
+            'stock_prices',
+            f"""
+            SELECT date, symbol, close, volume, daily_return, ma_7, ma_30, price_change_pct
+            FROM `{self.dataset_ref}.stock_prices`
+            """,
+            partition_field='date',
+            clustering_fields=['symbol']
+        )
     
     def _create_table(self, table_name, schema):
         """Create a single table"""
@@ -137,6 +153,41 @@ class BigQueryLoader:
             table = self.client.create_table(table)
             print(f"✅ Created table {table_name}")
     
+    def _create_materialized_view(self, view_name, base_table, query, partition_field=None, clustering_fields=None):
+        """Create a materialized view over one of the tables (skipped until the table exists)"""
+        view_id = f"{self.dataset_ref}.{view_name}"
+        
+        try:
+            self.client.get_table(view_id)
+            print(f"✅ Materialized view {view_name} already exists")
+            return
+        except NotFound:
+            pass
+        
+        try:
+            base = self.client.get_table(f"{self.dataset_ref}.{base_table}")
+        except NotFound:
+            print(f"⚠️  Skipping materialized view {view_name}: {base_table} does not exist yet")
+            return
+        
+        try:
+            view = bigquery.Table(view_id)
+            view.mview_query = query
+            base_partitioning = base.time_partitioning
+            if partition_field and base_partitioning and base_partitioning.field == partition_field:
+                # Must match the base table's partitioning (a load-created table has none)
+                view.time_partitioning = bigquery.TimePartitioning(
+                    type_=bigquery.TimePartitioningType.DAY,
+                    field=partition_field
+                )
+            view.clustering_fields = clustering_fields
+            
+            self.client.create_table(view)
+            print(f"✅ Created materialized view {view_name}")
+        except Exception as e:
+            # Readers fall back to the base table, so a missing view is not fatal
+            print(f"❌ Error creating materialized view {view_name}: {str(e)}")
+    
     def load_data(self, df, table_name, write_disposition="WRITE_APPEND"):
         """Load DataFrame to BigQuery table"""
         if df.empty:
@@ -145,17 +196,25 @@ class BigQueryLoader:
         
         table_id = f"{self.dataset_ref}.{table_name}"
         
+        # Known columns get their declared types, so the client neither fetches the
+        # table schema nor infers one before serializing to Parquet
+        schema = [field for field in TABLE_SCHEMAS.get(table_name, []) if field.name in df.columns]
+        
         # Configure job based on write disposition
         if write_disposition == "WRITE_TRUNCATE":
             # For TRUNCATE, don't use schema update options
             job_config = bigquery.LoadJobConfig(
                 write_disposition=write_disposition,
+                source_format=bigquery.SourceFormat.PARQUET,
+                schema=schema or None,
                 autodetect=False
             )
         else:
             # For APPEND, allow schema updates
             job_config = bigquery.LoadJobConfig(
                 write_disposition=write_disposition,
+                source_format=bigquery.SourceFormat.PARQUET,
+                schema=schema or None,
                 autodetect=False,
                 schema_update_options=[
                     bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION
@@ -163,10 +222,12 @@ class BigQueryLoader:
             )
         
         try:
+            # Serialized column-wise through pyarrow; no CSV/JSON row encoding
             job = self.client.load_table_from_dataframe(
                 df, 
                 table_id, 
-                job_config=job_config
+                job_config=job_config,
+                parquet_compression='snappy'
             )
             job.result()  # Wait for completion
             
@@ -193,11 +254,23 @@ class BigQueryLoader:
         """Load portfolio (replace existing data)"""
         return self.load_data(df, 'user_portfolio', write_disposition)
     
-    def log_pipeline_metrics(self, metrics_dict):
-        """Log pipeline execution metrics"""
+    def log_pipeline_metrics(self, metrics_dict, buffer=False):
+        """Log pipeline execution metrics (with buffer=True, hold the row for flush_metrics())"""
+        if buffer:
+            self._metrics_buffer.append(metrics_dict)
+            return 0
         df = pd.DataFrame([metrics_dict])
         return self.load_data(df, 'pipeline_metrics')
     
+    def flush_metrics(self):
+        """Write all buffered metrics rows in a single load job"""
+        if not self._metrics_buffer:
+            return 0
+        df = pd.DataFrame.from_records(self._metrics_buffer)
+        loaded = self.load_data(df, 'pipeline_metrics')
+        self._metrics_buffer = []
+        return loaded
+    
     def query_data(self, query):
         """Execute query and return results"""
         try:
@@ -209,13 +282,12 @@ class BigQueryLoader:
             return pd.DataFrame()
     
     def get_table_row_count(self, table_name):
-        """Get row count for a table"""
-        query = f"""
-        SELECT COUNT(*) as count
-        FROM `{self.dataset_ref}.{table_name}`
-        """
-        df = self.query_data(query)
-        return df['count'].iloc[0] if not df.empty else 0
+        """Get row count for a table (from table metadata; no query or bytes scanned)"""
+        try:
+            return self.client.get_table(f"{self.dataset_ref}.{table_name}").num_rows
+        except Exception as e:
+            print(f"❌ Row count error: {str(e)}")
+            return 0
 
 # Test
 if __name__ == "__main__":
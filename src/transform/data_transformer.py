@@ -2,6 +2,14 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Plain-substring keyword flags for news titles (has_<keyword> columns)
+NEWS_KEYWORDS = ['earnings', 'merger', 'acquisition', 'revenue', 'profit', 
+                 'loss', 'growth', 'decline', 'bullish', 'bearish']
+
+# Crypto price_category buckets: (0, 100], (100, 1000], (1000, 10000], (10000, inf)
+PRICE_CATEGORY_EDGES = np.array([100, 1000, 10000])
+PRICE_CATEGORY_LABELS = ['low', 'medium', 'high', 'very_high']
+
 class DataTransformer:
     
     def transform_stock_data(self, df):
@@ -10,17 +18,23 @@ class DataTransformer:
             return df
         
         # 1. Data type conversions
-        df['date'] = pd.to_datetime(df['date'])
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601', cache=True)
         numeric_cols = ['open', 'high', 'low', 'close', 'volume']
         for col in numeric_cols:
             df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        # 2. Handle missing values
-        df = df.dropna(subset=['close'])
-        df['volume'] = df['volume'].fillna(0)
-        
-        # 3. Feature engineering
-        df['daily_return'] = df.groupby('symbol')['close'].pct_change()
+        # 2. Handle missing values, validate and de-duplicate before any features are
+        #    computed, so dropped rows never feed a return or rolling window
+        df.fillna({'volume': 0}, inplace=True)
+        valid = ((df['close'] > 0) & (df['volume'] >= 0)).to_numpy()  # NaN close compares False
+        # Positional masks, so a non-unique index (e.g. concat without ignore_index) is fine
+        duplicate = np.ones(len(df), dtype=bool)
+        duplicate[valid] = df.loc[valid, ['symbol', 'date']].duplicated().to_numpy()
+        df = df.loc[valid & ~duplicate]  # single copy of the frame
+        
+        # 3. Feature engineering (chronological within each symbol; the API returns newest first)
+        df = df.sort_values(['symbol', 'date'], kind='mergesort', ignore_index=True)
+        df['daily_return'] = df.groupby('symbol', sort=False)['close'].pct_change()
         df['price_range'] = df['high'] - df['low']
         df['price_change'] = df['close'] - df['open']
         df['price_change_pct'] = (df['price_change'] / df['open']) * 100
@@ -29,31 +43,28 @@ class DataTransformer:
         df = self._add_moving_averages(df)
         df = self._add_volatility(df)
         
-        # 5. Data validation
-        df = df[df['close'] > 0]
-        df = df[df['volume'] >= 0]
-        
-        # 6. Remove duplicates
-        df = df.drop_duplicates(subset=['symbol', 'date'])
-        
-        # 7. Add metadata
+        # 5. Add metadata
         df['transformed_at'] = datetime.now()
         
         print(f"✅ Transformed {len(df)} stock records")
         return df
     
     def _add_moving_averages(self, df):
-        """Add moving averages"""
+        """Add moving averages (expects df sorted by symbol, date)"""
+        closes = df.groupby('symbol', sort=False)['close']
         for window in [7, 30]:
-            df[f'ma_{window}'] = df.groupby('symbol')['close'].transform(
-                lambda x: x.rolling(window=window, min_periods=1).mean()
+            df[f'ma_{window}'] = (
+                closes.rolling(window=window, min_periods=1).mean()
+                .reset_index(level=0, drop=True)
             )
         return df
     
     def _add_volatility(self, df):
-        """Add volatility metrics"""
-        df['volatility_30d'] = df.groupby('symbol')['daily_return'].transform(
-            lambda x: x.rolling(window=30, min_periods=1).std()
+        """Add volatility metrics (expects df sorted by symbol, date)"""
+        df['volatility_30d'] = (
+            df.groupby('symbol', sort=False)['daily_return']
+            .rolling(window=30, min_periods=1).std()
+            .reset_index(level=0, drop=True)
         )
         return df
     
@@ -63,18 +74,19 @@ class DataTransformer:
             return df
         
         # 1. Data type conversions
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
         df['price_usd'] = pd.to_numeric(df['price_usd'], errors='coerce')
         df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce')
         
         # 2. Handle missing values
         df = df.dropna(subset=['price_usd'])
         
-        # 3. Feature engineering
-        df['price_category'] = pd.cut(
-            df['price_usd'],
-            bins=[0, 100, 1000, 10000, float('inf')],
-            labels=['low', 'medium', 'high', 'very_high']
+        # 3. Feature engineering: binary-search the bucket edges (right-closed like pd.cut)
+        prices = df['price_usd'].to_numpy()
+        codes = np.searchsorted(PRICE_CATEGORY_EDGES, prices, side='left')
+        codes = np.where(prices > 0, codes, -1).astype('int8')  # non-positive -> missing
+        df['price_category'] = pd.Categorical.from_codes(
+            codes, categories=PRICE_CATEGORY_LABELS, ordered=True
         )
         
         # 4. Add metadata
@@ -88,16 +100,14 @@ class DataTransformer:
         if df.empty:
             return df
         
-        # 1. Clean text
-        df['title'] = df['title'].str.strip()
+        # 1. Clean text (Arrow-backed strings, so the .str calls below run as Arrow kernels)
+        df['title'] = df['title'].astype(pd.StringDtype('pyarrow')).str.strip()
         df['title_length'] = df['title'].str.len()
         
-        # 2. Extract keywords (simple version)
-        keywords = ['earnings', 'merger', 'acquisition', 'revenue', 'profit', 
-                   'loss', 'growth', 'decline', 'bullish', 'bearish']
-        
-        for keyword in keywords:
-            df[f'has_{keyword}'] = df['title'].str.lower().str.contains(keyword, na=False)
+        # 2. Extract keywords (simple version): lowercase once, literal matching
+        lower_title = df['title'].str.lower()
+        for keyword in NEWS_KEYWORDS:
+            df[f'has_{keyword}'] = lower_title.str.contains(keyword, regex=False, na=False)
         
         # 3. Remove duplicates
         df = df.drop_duplicates(subset=['title', 'symbol'])
@@ -114,13 +124,16 @@ class DataTransformer:
             return df
         
         # 1. Data type conversions
-        df['purchase_date'] = pd.to_datetime(df['purchase_date'])
+        df['purchase_date'] = pd.to_datetime(df['purchase_date'], format='ISO8601', cache=True)
         df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
         df['purchase_price'] = pd.to_numeric(df['purchase_price'], errors='coerce')
         
-        # 2. Calculate metrics
-        df['cost_basis'] = df['quantity'] * df['purchase_price']
-        df['holding_days'] = (datetime.now() - df['purchase_date']).dt.days
+        # 2. Calculate metrics (plain numpy arithmetic on aligned columns)
+        df['cost_basis'] = df['quantity'].to_numpy() * df['purchase_price'].to_numpy()
+        today = np.datetime64(datetime.now(), 'D')
+        holding_days = (today - df['purchase_date'].to_numpy().astype('datetime64[D]')) / np.timedelta64(1, 'D')
+        # Whole days as int64, unless a missing purchase_date forces NaN (as .dt.days would)
+        df['holding_days'] = holding_days if np.isnan(holding_days).any() else holding_days.astype('int64')
         
         # 3. Add metadata
         df['transformed_at'] = datetime.now()